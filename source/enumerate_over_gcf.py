@@ -1,13 +1,17 @@
 import os
+import atexit
 import pickle
 import itertools
 import multiprocessing
-from functools import partial, reduce
+from multiprocessing import shared_memory
+from functools import partial, lru_cache
 from datetime import datetime
 from time import time
 from math import gcd
 from typing import List, Iterator, Callable
 from collections import namedtuple
+import numpy as np
+from numba import njit, prange
 import mpmath
 import sympy
 from sympy import lambdify
@@ -15,6 +19,8 @@ from latex import generate_latex
 from mobius import GeneralizedContinuedFraction, EfficientGCF
 from convergence_rate import calculate_convergence
 from series_generators import SeriesGeneratorClass, CartesianProductAnGenerator, CartesianProductBnGenerator
+from series_generators import create_series_from_compact_poly, create_series_from_compact_poly_with_shift1, \
+    create_series_from_compact_poly_with_shift2n1
 
 
 # intermediate result - coefficients of lhs transformation, and compact polynomials for seeding an and bn series.
@@ -35,10 +41,127 @@ class GlobalHashTableInstance:
         self.name = ''
 
 
+class GlobalEnumeratorInstance:
+    def __init__(self):
+        """
+        initializing the search engine builds the lambdified constants and loads the hash table.
+        when process creation uses 'Copy On Write', child processes can reuse the instance that the
+        parent already built instead of re-initializing all of it per process (same idea as
+        GlobalHashTableInstance above).
+        """
+        self.enumerator = None
+        self.saved_hash = ''
+        # bumped per search. a pool worker forked during an earlier search must not reuse its
+        # inherited enumerator for a later one (the hash filename alone doesn't identify the
+        # series generators), so reuse is keyed on this token instead.
+        self.generation = 0
+
+
+class GlobalPoolInstance:
+    def __init__(self):
+        """
+        spinning up a process pool is expensive on 'spawn' platforms (the whole module graph is
+        re-imported per worker), so one pool is kept alive and reused across searches (same idea
+        as GlobalHashTableInstance above).
+        """
+        self.pool = None
+        self.num_cores = 0
+
+
 # global instance
 g_hash_instance = GlobalHashTableInstance()
+g_enumerator_instance = GlobalEnumeratorInstance()
+g_pool_instance = GlobalPoolInstance()
 g_N_verify_terms = 1000
 g_N_initial_search_terms = 32
+g_N_screen_terms = 100      # gcf length for the cheap screening pass of the verification
+g_screen_dps = 50           # working precision of the screening pass
+g_N_screen_digits = 12      # digits compared by the screening pass
+
+
+# the kernels below carry explicit signatures, so they compile eagerly at import time and land in
+# the on-disk cache - later runs just load the compiled artifact instead of paying jit warmup on
+# the first search.
+@njit('UniTuple(f8, 2)(f8[:], f8[:], f8)', cache=True)
+def _gcf_key_approx(a_, b_, key_factor):
+    """
+    float64 version of the gcf convergent recurrence, compiled with numba.
+    the exact recurrence works on python big ints (p and q grow to hundreds of digits over 32 terms),
+    so it cannot be jitted directly over int64. instead we run it in float64 as a cheap pre-filter,
+    and let the caller confirm any near-hit with the exact integer recurrence.
+    :return: (approximated key, error bound on the key). the error bound is +-inf when the
+             approximation suffered catastrophic cancellation and cannot be trusted.
+    """
+    prev_q = 0.0
+    q = 1.0
+    prev_p = 1.0
+    p = a_[0]
+    cancellation = 1.0  # worst loss of significant digits along the recurrence
+    for i in range(1, a_.shape[0]):
+        q_keep = a_[i] * q
+        p_keep = a_[i] * p
+        new_q = q_keep + b_[i - 1] * prev_q
+        new_p = p_keep + b_[i - 1] * prev_p
+        if new_q != 0:
+            loss = max(abs(q_keep), abs(b_[i - 1] * prev_q)) / abs(new_q)
+            if loss > cancellation:
+                cancellation = loss
+        if new_p != 0:
+            loss = max(abs(p_keep), abs(b_[i - 1] * prev_p)) / abs(new_p)
+            if loss > cancellation:
+                cancellation = loss
+        prev_q = q
+        prev_p = p
+        q = new_q
+        p = new_p
+    if q == 0.0:
+        return 0.0, np.inf  # might be a real 0 or a rounding artifact - let the caller decide exactly
+    value = (p / q) * key_factor
+    error = abs(value) * (a_.shape[0] * 4.0e-16) * cancellation + 2.0
+    return value, error
+
+
+@njit('void(f8[:], f8[:, :], f8, f8[:], f8[:])', parallel=True, cache=True)
+def _gcf_keys_approx_bn_batch(a_, bn_mat, key_factor, keys_out, errors_out):
+    """ approximate the keys of one {an} against a whole matrix of {bn} rows in a single call """
+    for r in prange(bn_mat.shape[0]):
+        keys_out[r], errors_out[r] = _gcf_key_approx(a_, bn_mat[r], key_factor)
+
+
+@njit('void(f8[:, :], f8[:], f8, f8[:], f8[:])', parallel=True, cache=True)
+def _gcf_keys_approx_an_batch(an_mat, b_, key_factor, keys_out, errors_out):
+    """ approximate the keys of one {bn} against a whole matrix of {an} rows in a single call """
+    for r in prange(an_mat.shape[0]):
+        keys_out[r], errors_out[r] = _gcf_key_approx(an_mat[r], b_, key_factor)
+
+
+@njit('void(i8[:, :], i8, i8, i8[:, :])', parallel=True, cache=True)
+def _compact_poly_series_batch(coefs_mat, offset, step, out):
+    """ expand a whole matrix of compact poly coefficient rows into series over m = offset + step*i """
+    for r in prange(coefs_mat.shape[0]):
+        for i in range(out.shape[1]):
+            m = offset + step * i
+            tmp = 0
+            for c in coefs_mat[r]:
+                tmp *= m
+                tmp += c
+            out[r, i] = tmp
+
+
+# the built-in compact poly series are plain horner evaluations over m = offset + step*n, so whole
+# coefficient matrices can be expanded with the jitted kernel instead of one python call per row.
+g_compact_poly_offsets = {
+    create_series_from_compact_poly: (0, 1),
+    create_series_from_compact_poly_with_shift1: (1, 1),
+    create_series_from_compact_poly_with_shift2n1: (1, 2),
+}
+
+# when the key error bound passes this, scanning the hash table around the approximated key costs
+# more than just running the exact integer recurrence.
+g_max_key_error = 50.0
+
+# minimal time between status prints of the first enumeration.
+g_status_interval_sec = 5.0
 
 
 def get_size_of_nested_list(list_of_elem):
@@ -74,13 +197,13 @@ class LHSHashTable(object):
         return ret
 
     def evaluate(self, key, constant_values):
-        c_top, c_bottom = self.s[key]
+        c_top, c_bottom = self[key]
         numerator = self.prod(c_top, constant_values)
         denominator = self.prod(c_bottom, constant_values)
         return mpmath.mpf(numerator) / mpmath.mpf(denominator)
 
     def evaluate_sym(self, key, symbols):
-        c_top, c_bottom = self.s[key]
+        c_top, c_bottom = self[key]
         numerator = self.prod(c_top, symbols)
         denominator = self.prod(c_bottom, symbols)
         return numerator / denominator
@@ -94,43 +217,80 @@ class LHSHashTable(object):
                             -log_{10}(threshold) digits of the value. for example, if threshold is 1e-10 - then the
                             first 10 digits will be used as the hash key.
         """
-        self.s = {}
+        s = {}
         self.threshold = threshold
-        key_factor = 1 / threshold
+        key_factor = round(1 / threshold)
 
-        # create blacklist of rational numbers
-        coef_possibilities = [i for i in range(-search_range, search_range+1)]
-        coef_possibilities.remove(0)
-        rational_options = itertools.product(*[coef_possibilities, coef_possibilities])
-        rational_keys = [int((mpmath.mpf(ratio[0]) / ratio[1]) * key_factor) for ratio in rational_options]
+        # create blacklist of rational numbers with one int64 broadcast - the keys are exact
+        # truncating divisions (numpy's // floors, so divide magnitudes and apply the sign).
+        coefs_1d = np.concatenate([np.arange(-search_range, 0), np.arange(1, search_range + 1)]).astype(np.int64)
+        magnitudes = (np.abs(coefs_1d)[:, None] * key_factor) // np.abs(coefs_1d)[None, :]
+        rational_keys = (np.sign(coefs_1d)[:, None] * np.sign(coefs_1d)[None, :] * magnitudes).ravel()
         # +-1 for numeric errors in keys.
-        rational_blacklist = set(rational_keys + [x+1 for x in rational_keys] + [x-1 for x in rational_keys])
+        blacklist_array = np.unique(np.concatenate([rational_keys - 1, rational_keys, rational_keys + 1]))
 
-        # create enumeration lists
+        # enumerate all coefficient combinations as a single int matrix (built directly with numpy,
+        # no itertools.product materialization), and evaluate every linear combination of the
+        # constants as an exact scaled integer (the scale leaves plenty of spare digits beyond the
+        # key length, so keys come out exact without any mpf divisions).
         constants = [mpmath.mpf(1)] + const_vals
-        coefs_top = [range(-search_range, search_range + 1)] * len(constants)  # numerator range
-        coefs_bottom = [range(-search_range, search_range + 1)] * len(constants)  # denominator range
-        coef_top_list = itertools.product(*coefs_top)
-        coef_bottom_list = list(itertools.product(*coefs_bottom))
-        denominator_list = [sum(i*j for (i, j) in zip(c_bottom, constants)) for c_bottom in coef_bottom_list]
-
-        # start enumerating
-        for c_top in coef_top_list:
-            numerator = sum(i * j for (i, j) in zip(c_top, constants))
-            if numerator <= 0:  # allow only positive values to avoid duplication
-                continue
-            numerator = mpmath.mpf(numerator)
-            for c_bottom, denominator in zip(coef_bottom_list, denominator_list):
-                if reduce(gcd, c_top + c_bottom) != 1:  # avoid expressions that can be simplified easily
-                    continue
-                if denominator == 0:  # don't store inf or nan.
-                    continue
-                val = numerator / denominator
-                key = int(val * key_factor)
-                if key in rational_blacklist:
-                    # don't store values that are independent of the constant (e.g. rational numbers)
-                    continue
-                self.s[key] = c_top, c_bottom  # store key and transformation
+        scale = 10 ** 25
+        scaled_constants = np.array([int(c * scale) for c in constants], dtype=object)
+        axis = np.arange(-search_range, search_range + 1, dtype=np.int64)
+        grids = np.meshgrid(*[axis] * len(constants), indexing='ij')
+        coefs = np.stack([grid.ravel() for grid in grids], axis=1)
+        scaled_values = coefs.astype(object) @ scaled_constants
+        top_mask = scaled_values > 0  # allow only positive numerators to avoid duplication
+        bottom_mask = scaled_values != 0  # don't store inf or nan.
+        tops, top_values = coefs[top_mask], scaled_values[top_mask]
+        bottoms, bottom_values = coefs[bottom_mask], scaled_values[bottom_mask]
+
+        # start enumerating. all denominators are handled at once per numerator with vectorized masks,
+        # python-level work is left only for the pairs that are actually stored. gcd(pair) equals
+        # gcd(gcd(top), gcd(bottom)), so the per-row gcds are reduced once up front and each
+        # numerator costs just a single scalar-vs-vector gcd instead of reducing the full pair.
+        top_gcds = np.gcd.reduce(tops, axis=1)
+        bottom_gcds = np.gcd.reduce(bottoms, axis=1)
+        for c_top, numerator, top_gcd in zip(tops, top_values, top_gcds):
+            scaled_numerator = numerator * key_factor
+            # avoid expressions that can be simplified easily
+            coprime = np.gcd(top_gcd, bottom_gcds)
+            allowed = np.nonzero(coprime == 1)[0]
+            # truncating integer division, matching int(val * key_factor)
+            keys = np.fromiter((scaled_numerator // d if d > 0 else -(scaled_numerator // -d)
+                                for d in bottom_values[allowed]),
+                               dtype=np.int64, count=allowed.size)
+            # don't store values that are independent of the constant (e.g. rational numbers)
+            keep = ~np.isin(keys, blacklist_array)
+            c_top_tuple = tuple(int(c) for c in c_top)
+            for j, key in zip(allowed[keep], keys[keep].tolist()):
+                s[key] = c_top_tuple, tuple(int(c) for c in bottoms[j])  # store key and transformation
+
+        # membership checks happen millions of times during the first enumeration, so instead of a
+        # python dict we keep a sorted int64 key array (binary search, and batched queries come free)
+        # with the transformations in parallel int matrices (these are also what save writes to disk).
+        self._keys = np.fromiter(s.keys(), dtype=np.int64, count=len(s))
+        order = np.argsort(self._keys)
+        self._keys = self._keys[order]
+        top_rows, bottom_rows = zip(*s.values())
+        self._top = np.array(top_rows, dtype=np.int32)[order]
+        self._bot = np.array(bottom_rows, dtype=np.int32)[order]
+
+    def _index_of(self, key):
+        idx = np.searchsorted(self._keys, key)
+        if idx < self._keys.size and self._keys[idx] == key:
+            return int(idx)
+        return -1
+
+    def contains_range(self, lows, highs):
+        """
+        vectorized check whether any stored key falls inside [low, high], element-wise.
+        :param lows: array of lower key bounds
+        :param highs: array of upper key bounds (inclusive)
+        :return: boolean mask
+        """
+        idx = np.searchsorted(self._keys, lows)
+        return (idx < self._keys.size) & (self._keys[np.minimum(idx, self._keys.size - 1)] <= highs)
 
     def __contains__(self, item):
         """
@@ -138,7 +298,7 @@ class LHSHashTable(object):
         :param item: key
         :return: true of false
         """
-        return item in self.s
+        return self._index_of(item) >= 0
 
     def __getitem__(self, item):
         """
@@ -146,7 +306,10 @@ class LHSHashTable(object):
         :param item: key
         :return: transformation of x
         """
-        return self.s[item]
+        idx = self._index_of(item)
+        if idx < 0:
+            raise KeyError(item)
+        return tuple(int(c) for c in self._top[idx]), tuple(int(c) for c in self._bot[idx])
 
     def __eq__(self, other):
         """
@@ -157,19 +320,40 @@ class LHSHashTable(object):
         if type(other) != type(self):
             return False
         ret = self.threshold == other.threshold
-        ret &= sorted(self.s.keys()) == sorted(other.s.keys())
+        ret &= np.array_equal(self._keys, other._keys)
         return ret
 
+    def share_keys(self):
+        """
+        export the sorted key array to a SharedMemory block, so worker processes can map it
+        instead of each holding a private copy.
+        :return: the shared memory block. the caller owns it and should unlink it when done.
+        """
+        shm = shared_memory.SharedMemory(create=True, size=self._keys.nbytes)
+        shared = np.ndarray(self._keys.shape, dtype=self._keys.dtype, buffer=shm.buf)
+        shared[:] = self._keys
+        return shm
+
+    def attach_shared_keys(self, shm_name):
+        """
+        replace the private key array with the one in the named SharedMemory block.
+        :param shm_name: name of a block created by share_keys on the same table.
+        """
+        shm = shared_memory.SharedMemory(name=shm_name)
+        self._keys = np.ndarray((self._keys.size,), dtype=np.int64, buffer=shm.buf)
+        self._shm = shm     # keep a reference so the mapping stays alive
+
     def save(self, name):
         """
-        save the hash table as file
+        save the hash table as file. the table is stored as a compressed npz of its int arrays,
+        which is much smaller and faster to reload than pickling the whole object.
         :param name: path for file.
         """
         if g_hash_instance.name != name:  # save to global instance.
             g_hash_instance.hash = self
             g_hash_instance.name = name
         with open(name, 'wb') as f:
-            pickle.dump(self, f)
+            np.savez_compressed(f, threshold=self.threshold, keys=self._keys, top=self._top, bot=self._bot)
 
     @classmethod
     def load_from(cls, name):
@@ -184,7 +368,27 @@ class LHSHashTable(object):
         else:
             with open(name, 'rb') as f:
                 print('not loading instance')
-                ret = pickle.load(f)
+                try:
+                    data = np.load(f)
+                    ret = cls.__new__(cls)
+                    ret.threshold = float(data['threshold'])
+                    ret._keys = data['keys']
+                    ret._top = data['top']
+                    ret._bot = data['bot']
+                except (ValueError, OSError):   # tables saved by older versions were pickled whole
+                    f.seek(0)
+                    ret = pickle.load(f)
+                    if not hasattr(ret, '_top'):
+                        # legacy layouts kept the transformations in a dict (or a tuple array) -
+                        # rebuild the arrays the current accessors expect.
+                        items = ret.s.items() if hasattr(ret, 's') else zip(ret._keys, ret._values)
+                        keys, values = zip(*items)
+                        keys = np.fromiter(keys, dtype=np.int64, count=len(keys))
+                        order = np.argsort(keys)
+                        top_rows, bottom_rows = zip(*values)
+                        ret._keys = keys[order]
+                        ret._top = np.array(top_rows, dtype=np.int32)[order]
+                        ret._bot = np.array(bottom_rows, dtype=np.int32)[order]
                 g_hash_instance.hash = ret  # save in instance
                 g_hash_instance.name = name
         return ret
@@ -217,18 +421,19 @@ class EnumerateOverGCF(object):
                 self.constants_generator.append(lambdify((), sym_constants[i], modules="mpmath"))
             except AttributeError:      # Hackish constant
                 self.constants_generator.append(sym_constants[i].mpf_val)
+        self._constant_values_cache = {}
 
-        self.create_an_series = an_generator.get_function()
+        self.create_an_series = self.__memoize_series_generator(an_generator.get_function())
         self.get_an_length = an_generator.get_num_iterations
         self.get_an_iterator = an_generator.get_iterator
-        self.create_bn_series = bn_generator.get_function()
+        self.create_bn_series = self.__memoize_series_generator(bn_generator.get_function())
         self.get_bn_length = bn_generator.get_num_iterations
         self.get_bn_iterator = bn_generator.get_iterator
 
         if saved_hash is None:
             print('no previous hash table given, initializing hash table...')
             with mpmath.workdps(self.enum_dps):
-                constants = [const() for const in self.constants_generator]
+                constants = self.__get_constant_values()
                 start = time()
                 self.hash_table = LHSHashTable(
                     self.lhs_limit,
@@ -239,21 +444,58 @@ class EnumerateOverGCF(object):
         else:
             self.hash_table = LHSHashTable.load_from(saved_hash)
 
+    def __get_constant_values(self):
+        """
+        evaluate the constants at the current working precision.
+        re-running the symbolic evaluation (e.g. a zeta value at 4000 digits) is expensive,
+        so the values are cached per precision.
+        """
+        dps = mpmath.mp.dps
+        if dps not in self._constant_values_cache:
+            self._constant_values_cache[dps] = [const() for const in self.constants_generator]
+        return self._constant_values_cache[dps]
+
+    @staticmethod
+    def __memoize_series_generator(series_generator: Callable[[List[int], int], List[int]]
+                                   ) -> Callable[[List[int], int], List[int]]:
+        """
+        the same compact poly is expanded to a series several times along a search (first enumeration,
+        refinement, printing), so cache the expansions. coefficients are keyed by their tuple form.
+        """
+        @lru_cache(maxsize=2 ** 16)
+        def expand_series(coefficients, n):
+            return series_generator(coefficients, n)
+
+        def memoized(coefficients, n):
+            return expand_series(tuple(coefficients), n)
+
+        memoized.series_generator = series_generator    # keep the raw function reachable for batching
+        return memoized
+
     @staticmethod
     def __create_series_list(coefficient_iter: Iterator,
                              series_generator: Callable[[List[int], int], List[int]],
-                             filter_from_1=False) -> [List[int], List[int]]:
+                             filter_from_1=False) -> [List[int], np.ndarray]:
         coef_list = list(coefficient_iter)
-        # create a_n and b_n series fro coefficients.
-        series_list = [series_generator(coef_list[i], g_N_initial_search_terms) for i in range(len(coef_list))]
+        # create a_n and b_n series fro coefficients, packed as rows of one int matrix.
+        # known compact polys expand in one jitted call, anything custom goes row by row in python.
+        raw_generator = getattr(series_generator, 'series_generator', series_generator)
+        if raw_generator in g_compact_poly_offsets:
+            offset, step = g_compact_poly_offsets[raw_generator]
+            coefs_mat = np.array(coef_list, dtype=np.int64).reshape(len(coef_list), -1)
+            series_mat = np.empty((coefs_mat.shape[0], g_N_initial_search_terms), dtype=np.int64)
+            _compact_poly_series_batch(coefs_mat, offset, step, series_mat)
+        else:
+            series_mat = np.array([series_generator(coef, g_N_initial_search_terms) for coef in coef_list],
+                                  dtype=np.int64).reshape(-1, g_N_initial_search_terms)
         # filter out all options resulting in '0' in any series term.
         if filter_from_1:
-            series_filter = [0 not in an[1:] for an in series_list]
+            series_filter = ~np.any(series_mat[:, 1:] == 0, axis=1)
         else:
-            series_filter = [0 not in an for an in series_list]
-        series_list = list(itertools.compress(series_list, series_filter))
+            series_filter = ~np.any(series_mat == 0, axis=1)
+        series_mat = series_mat[series_filter]
         coef_list = list(itertools.compress(coef_list, series_filter))
-        return coef_list, series_list
+        return coef_list, series_mat
 
     def __first_enumeration(self, poly_a: List[List], poly_b: List[List], print_results: bool):
         """
@@ -282,6 +524,7 @@ class EnumerateOverGCF(object):
             q = 1
             prev_p = 1
             p = a_[0]
+            prev_key = None
             for i in range(1, len(a_)):
                 tmp_a = q
                 tmp_b = p
@@ -289,11 +532,24 @@ class EnumerateOverGCF(object):
                 p = a_[i] * p + b_[i - 1] * prev_p
                 prev_q = tmp_a
                 prev_p = tmp_b
+                if i % 4 == 0 and q != 0:
+                    # the key only needs the first digits of p / q. once two checkpoints agree
+                    # the convergent is already stable there, so skip the remaining
+                    # (increasingly expensive) big-int iterations.
+                    if (p >= 0) == (q > 0):
+                        key = (abs(p) * key_factor) // abs(q)
+                    else:
+                        key = -((abs(p) * key_factor) // abs(q))
+                    if key == prev_key:
+                        return key
+                    prev_key = key
             if q == 0:  # safety check
-                value = 0
-            else:
-                value = mpmath.mpf(p) / mpmath.mpf(q)
-            return int(value * key_factor)  # calculate hash key of gcf value
+                return 0
+            # calculate hash key of gcf value with pure int arithmetic - first key digits of p / q.
+            # this is truncating division (like int(mpf(p) / mpf(q) * key_factor)), so mind the signs.
+            if (p >= 0) == (q > 0):
+                return (abs(p) * key_factor) // abs(q)
+            return -((abs(p) * key_factor) // abs(q))
 
         start = time()
         a_coef_iter = self.get_an_iterator(poly_a)  # all coefficients possibilities for 'a_n'
@@ -301,16 +557,41 @@ class EnumerateOverGCF(object):
         size_b = self.get_bn_length(poly_b)
         size_a = self.get_an_length(poly_a)
         num_iterations = size_b * size_a
-        key_factor = 1 / self.threshold
+        key_factor = round(1 / self.threshold)
+        key_factor_f = float(key_factor)
 
         counter = 0  # number of permutations passed
-        print_counter = counter
         results = []  # list of intermediate results
+        last_status = time()
+
+        def print_status():
+            """ print progress at most once every few seconds - keeps bookkeeping out of the hot loop. """
+            nonlocal last_status
+            now = time()
+            if now - last_status >= g_status_interval_sec:
+                last_status = now
+                print(f'passed {counter} out of {num_iterations}. found so far {len(results)} results')
+
+        def near_hit_rows(keys_approx, key_errors):
+            """
+            find the rows of a batched kernel call whose key window touches the hash table.
+            rows with an unusable error bound (inf / nan) are returned as well - they need the
+            exact evaluation either way.
+            """
+            usable = key_errors <= g_max_key_error
+            usable_rows = np.nonzero(usable)[0]
+            lows = np.floor(keys_approx[usable_rows] - key_errors[usable_rows])
+            highs = np.ceil(keys_approx[usable_rows] + key_errors[usable_rows])
+            near = self.hash_table.contains_range(lows, highs)
+            return itertools.chain(usable_rows[near], np.nonzero(~usable)[0])
 
         if size_a > size_b:     # cache {bn} in RAM, iterate over an
-            b_coef_list, bn_list = self.__create_series_list(b_coef_iter, self.create_bn_series)
-            real_bn_size = len(bn_list)
-            num_iterations = (num_iterations // self.get_bn_length(poly_b)) * real_bn_size
+            b_coef_list, bn_int_mat = self.__create_series_list(b_coef_iter, self.create_bn_series)
+            real_bn_size = bn_int_mat.shape[0]
+            bn_mat = bn_int_mat.astype(np.float64)
+            keys_approx = np.empty(real_bn_size, dtype=np.float64)
+            key_errors = np.empty(real_bn_size, dtype=np.float64)
+            num_iterations = size_a * real_bn_size
             if print_results:
                 print(f'created final enumerations filters after {time() - start}s')
             start = time()
@@ -318,27 +599,28 @@ class EnumerateOverGCF(object):
                 an = self.create_an_series(a_coef, 32)
                 if 0 in an[1:]:     # a_0 is allowed to be 0.
                     counter += real_bn_size
-                    print_counter += real_bn_size
                     continue
-                for bn_coef in zip(bn_list, b_coef_list):
-                    # evaluation of GCF: taken from mobius.EfficientGCF and moved here to avoid function call overhead.
+                an_array = np.array(an, dtype=np.float64)
+                # approximate against all cached {bn} in one jitted multi-threaded call,
+                # then run the exact big-int evaluation only on the near-hits.
+                _gcf_keys_approx_bn_batch(an_array, bn_mat, key_factor_f, keys_approx, key_errors)
+                for idx in near_hit_rows(keys_approx, key_errors):
                     a_ = an
-                    b_ = bn_coef[0]
+                    b_ = bn_int_mat[idx].tolist()   # back to python ints - the exact recurrence overflows int64
                     key = efficient_gcf_calculation()  # calculate hash key of gcf value
-
                     if key in self.hash_table:  # find hits in hash table
-                        results.append(Match(key, a_coef, bn_coef[1]))
-                    if print_results:
-                        counter += 1
-                        print_counter += 1
-                        if print_counter >= 100000:  # print status.
-                            print_counter = 0
-                            print(f'passed {counter} out of {num_iterations}. found so far {len(results)} results')
+                        results.append(Match(key, a_coef, b_coef_list[idx]))
+                counter += real_bn_size
+                if print_results:
+                    print_status()
 
         else:   # cache {an} in RAM, iterate over bn
-            a_coef_list, an_list = self.__create_series_list(a_coef_iter, self.create_an_series, filter_from_1=True)
-            real_an_size = len(an_list)
-            num_iterations = (num_iterations // self.get_an_length(poly_a)) * real_an_size
+            a_coef_list, an_int_mat = self.__create_series_list(a_coef_iter, self.create_an_series, filter_from_1=True)
+            real_an_size = an_int_mat.shape[0]
+            an_mat = an_int_mat.astype(np.float64)
+            keys_approx = np.empty(real_an_size, dtype=np.float64)
+            key_errors = np.empty(real_an_size, dtype=np.float64)
+            num_iterations = size_b * real_an_size
             if print_results:
                 print(f'created final enumerations filters after {time() - start}s')
             start = time()
@@ -346,21 +628,20 @@ class EnumerateOverGCF(object):
                 bn = self.create_bn_series(b_coef, 32)
                 if 0 in bn:
                     counter += real_an_size
-                    print_counter += real_an_size
                     continue
-                for an_coef in zip(an_list, a_coef_list):
-                    a_ = an_coef[0]
+                bn_array = np.array(bn, dtype=np.float64)
+                # approximate against all cached {an} in one jitted multi-threaded call,
+                # then run the exact big-int evaluation only on the near-hits.
+                _gcf_keys_approx_an_batch(an_mat, bn_array, key_factor_f, keys_approx, key_errors)
+                for idx in near_hit_rows(keys_approx, key_errors):
+                    a_ = an_int_mat[idx].tolist()   # back to python ints - the exact recurrence overflows int64
                     b_ = bn
                     key = efficient_gcf_calculation()  # calculate hash key of gcf value
-
                     if key in self.hash_table:  # find hits in hash table
-                        results.append(Match(key, an_coef[1], b_coef))
-                    if print_results:
-                        counter += 1
-                        print_counter += 1
-                        if print_counter >= 100000:  # print status.
-                            print_counter = 0
-                            print(f'passed {counter} out of {num_iterations}. found so far {len(results)} results')
+                        results.append(Match(key, a_coef_list[idx], b_coef))
+                counter += real_an_size
+                if print_results:
+                    print_status()
 
         if print_results:
             print(f'created results after {time() - start}s')
@@ -376,7 +657,7 @@ class EnumerateOverGCF(object):
         results = []
         counter = 0
         n_iterations = len(intermediate_results)
-        constant_vals = [const() for const in self.constants_generator]
+        constant_vals = self.__get_constant_values()
         for r in intermediate_results:
             counter += 1
             if (counter % 10) == 0 and print_results:
@@ -389,6 +670,16 @@ class EnumerateOverGCF(object):
             except ZeroDivisionError:
                 continue
 
+            # most intermediate results are false positives, so screen them first with a short gcf
+            # at low precision - mpmath work grows fast with dps, making this pass almost free.
+            with mpmath.workdps(g_screen_dps):
+                screen_gcf = EfficientGCF(self.create_an_series(r.rhs_an_poly, g_N_screen_terms),
+                                          self.create_bn_series(r.rhs_bn_poly, g_N_screen_terms))
+                screen_val = self.hash_table.evaluate(r.lhs_key, self.__get_constant_values())
+                if mpmath.nstr(screen_val, g_N_screen_digits) != mpmath.nstr(screen_gcf.evaluate(),
+                                                                             g_N_screen_digits):
+                    continue
+
             # create a_n, b_n with huge length, calculate gcf, and verify result.
             an = self.create_an_series(r.rhs_an_poly, g_N_verify_terms)
             bn = self.create_bn_series(r.rhs_bn_poly, g_N_verify_terms)
@@ -466,7 +757,8 @@ class EnumerateOverGCF(object):
 
 
 def multi_core_enumeration(sym_constant, lhs_search_limit, saved_hash, poly_a, poly_b, num_cores, splits_size,
-                           create_an_series=None, create_bn_series=None, index=0):
+                           create_an_series=None, create_bn_series=None, index=0, shared_keys_name=None,
+                           generation=None):
     """
     function to run for each process. this also divides the work to tiles/
     :param sym_constant: sympy constant for search
@@ -486,6 +778,10 @@ def multi_core_enumeration(sym_constant, lhs_search_limit, saved_hash, poly_a, p
     (default is create_series_from_compact_poly)
     :param create_bn_series: a custom function for creating b_n series with poly_b coefficients
     (default is create_series_from_compact_poly)
+    :param shared_keys_name: name of a SharedMemory block holding the hash table keys (see
+    LHSHashTable.share_keys). if given, the loaded table maps it instead of keeping a private copy.
+    :param generation: generation token of the search this call belongs to (see
+    GlobalEnumeratorInstance). the inherited enumerator is only reused when it matches.
     :return: results
     """
     for s in range(len(splits_size)):
@@ -494,13 +790,54 @@ def multi_core_enumeration(sym_constant, lhs_search_limit, saved_hash, poly_a, p
         else:
             poly_a[s] = poly_a[s][index * splits_size[s]:(index + 1) * splits_size[s]]
 
-    enumerator = EnumerateOverGCF(sym_constant, lhs_search_limit, saved_hash, create_an_series, create_bn_series)
+    if (g_enumerator_instance.enumerator is not None) and (g_enumerator_instance.generation == generation):
+        enumerator = g_enumerator_instance.enumerator  # inherited from the parent process, no re-init needed
+    else:
+        enumerator = EnumerateOverGCF(sym_constant, lhs_search_limit, saved_hash, create_an_series, create_bn_series)
+    if shared_keys_name is not None:
+        enumerator.hash_table.attach_shared_keys(shared_keys_name)
 
     results = enumerator.find_hits(poly_a, poly_b, index == (num_cores - 1))
 
     return results
 
 
+def _get_pool(num_cores):
+    """
+    return a process pool with num_cores workers, reusing the persistent one when possible.
+    :param num_cores: amount of worker processes.
+    """
+    if (g_pool_instance.pool is not None) and (g_pool_instance.num_cores != num_cores):
+        g_pool_instance.pool.terminate()
+        g_pool_instance.pool = None
+    if g_pool_instance.pool is None:
+        g_pool_instance.pool = multiprocessing.Pool(num_cores)
+        g_pool_instance.num_cores = num_cores
+    return g_pool_instance.pool
+
+
+@atexit.register
+def _shutdown_pool():
+    """ tear the persistent pool down cleanly on interpreter exit. """
+    if g_pool_instance.pool is not None:
+        g_pool_instance.pool.terminate()
+        g_pool_instance.pool = None
+
+
+def _worker_search(task):
+    """
+    pool task for multi_core_enumeration_wrapper - enumerate the tile of one core index.
+    the task carries the search arguments with it (there are exactly num_cores tasks per search,
+    so this costs the same as a pool initializer would - and the pool is reusable between searches).
+    """
+    index, (sym_constant, lhs_search_limit, saved_hash, poly_a, poly_b, num_cores, splits_size,
+            create_an_series, create_bn_series, shared_keys_name, generation) = task
+    # copy poly_a - multi_core_enumeration slices it in place, and a worker may run several tiles.
+    return multi_core_enumeration(sym_constant, lhs_search_limit, saved_hash, poly_a.copy(), poly_b, num_cores,
+                                  splits_size, create_an_series, create_bn_series, index, shared_keys_name,
+                                  generation)
+
+
 def multi_core_enumeration_wrapper(sym_constant, lhs_search_limit, poly_a, poly_b, num_cores, manual_splits_size=None,
                                    saved_hash=None, create_an_series=None, create_bn_series=None):
     """
@@ -523,37 +860,49 @@ def multi_core_enumeration_wrapper(sym_constant, lhs_search_limit, poly_a, poly_
     :return: results.
     """
     print(locals())
+    # build the search engine once. child processes reuse it through the global instance when
+    # process creation uses 'Copy On Write', and the final results formatting reuses it as well.
     if (saved_hash is None) or (not os.path.isfile(saved_hash)):
         if saved_hash is None:  # if no hash table given, build it here.
             saved_hash = 'tmp_hash.p'
-        enumerator = EnumerateOverGCF(sym_constant, lhs_search_limit)
+        enumerator = EnumerateOverGCF(sym_constant, lhs_search_limit,
+                                      an_generator=create_an_series, bn_generator=create_bn_series)
         enumerator.hash_table.save(saved_hash)  # and save it to file (and global instance)
     else:
-        if os.name != 'nt':  # if creation of process uses 'Copy On Write' we can benefit from it by
-            # loading the hash table to memory here.
-            EnumerateOverGCF(sym_constant, lhs_search_limit, saved_hash)
+        enumerator = EnumerateOverGCF(sym_constant, lhs_search_limit, saved_hash, create_an_series, create_bn_series)
+    g_enumerator_instance.enumerator = enumerator
+    g_enumerator_instance.saved_hash = saved_hash
+    g_enumerator_instance.generation += 1
 
     if manual_splits_size is None:  # naive work split
         manual_splits_size = [len(poly_a[0]) // num_cores]
 
-    # built function for processes
-    func = partial(multi_core_enumeration, sym_constant, lhs_search_limit, saved_hash, poly_a, poly_b, num_cores,
-                   manual_splits_size, create_an_series, create_bn_series)
-
     if num_cores == 1:  # don't open child processes
+        func = partial(multi_core_enumeration, sym_constant, lhs_search_limit, saved_hash, poly_a, poly_b, num_cores,
+                       manual_splits_size, create_an_series, create_bn_series,
+                       generation=g_enumerator_instance.generation)
         results = func(0)
         print(f'found {len(results)} results!')
     else:
         print('starting Multi-Processor search.\n\tNOTICE- intermediate status prints will be done by processor 0 only.')
-        pool = multiprocessing.Pool(num_cores)
-        partial_results = pool.map(func, range(num_cores))
+        # the sorted key array is by far the largest part of the hash table - share one copy between
+        # all worker processes instead of letting each load its own.
+        shared_keys = enumerator.hash_table.share_keys()
+        search_args = (sym_constant, lhs_search_limit, saved_hash, poly_a, poly_b, num_cores,
+                       manual_splits_size, create_an_series, create_bn_series, shared_keys.name,
+                       g_enumerator_instance.generation)
+        pool = _get_pool(num_cores)
         results = []
-        for r in partial_results:
+        for r in pool.imap_unordered(_worker_search, [(i, search_args) for i in range(num_cores)], chunksize=1):
             results += r
         print(f'found {len(results)} results!')
+        shared_keys.close()
+        try:
+            shared_keys.unlink()
+        except FileNotFoundError:   # a worker's resource tracker may have cleaned it up already
+            pass
 
     print('preparing results...')
-    enumerator = EnumerateOverGCF(sym_constant, lhs_search_limit, saved_hash, create_an_series, create_bn_series)
     print('results in unicode:')
     enumerator.print_results(results, latex=False, convergence_rate=False)
     print('results in latex:')
@@ -350,9 +350,9 @@ def esma_search_wrapper(constant, custom_enum, poly_deg, coeff_lim,
             dup = dup[:-1] + str(i)
             i += 1
         with open(res, 'wb') as f:
-            pickle.dump(result_list, f)
+            pickle.dump(result_list, f, protocol=pickle.HIGHEST_PROTOCOL)
         with open(dup, 'wb') as f:
-            pickle.dump(recurring_results_dict, f)
+            pickle.dump(recurring_results_dict, f, protocol=pickle.HIGHEST_PROTOCOL)
     return result_list, recurring_results_dict
 
 
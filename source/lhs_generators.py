@@ -1,6 +1,7 @@
 from time import time
 import pickle
 import itertools
+from functools import lru_cache
 from sympy import Abs, symbols
 from enumerate_over_signed_rcf import SignedRcfEnumeration
 
@@ -10,10 +11,23 @@ Similar to the series generators of the MITM flavor. Here we chose patterns for
 The enumeration of the LHS is a substantial part of the search. 
 """
 
+@lru_cache(maxsize=32)
+def _create_standard_lhs_cached(poly_deg, coefficients_limit):
+    """
+    the actual (expensive) enumeration behind create_standard_lhs, memoized per
+    (poly_deg, coefficients_limit). quiet, so printing preferences don't fragment the cache.
+    """
+    x = symbols('x')
+    enum = SignedRcfEnumeration(sym_constant=x, cycle_len_range=None, coefficients_limit=coefficients_limit,
+                                poly_deg=poly_deg, do_print=False)
+    return enum.create_rational_variations_enum()
+
+
 def create_standard_lhs(poly_deg, coefficients_limit, out_path=None, do_print=True):
     """
     Prepares generic LHS enumerations (variable 'x'). When used later in searching conjectures- 'x' will be substituted
     to any constant.
+    Repeated calls with the same degree and limit return a cached enumeration.
     :param poly_deg: Degree of polynomials in rational function.
     :param coefficients_limit: Limit for coefficients (symmetrical).
     :param out_dir: Directory for saving the binary LHS enumeration.
@@ -22,13 +36,10 @@ def create_standard_lhs(poly_deg, coefficients_limit, out_path=None, do_print=Tr
     if do_print:
         print("starting enumeration")
     strt = time()
-    x = symbols('x')
-    enum = SignedRcfEnumeration(sym_constant=x, cycle_len_range=None, coefficients_limit=coefficients_limit,
-                                poly_deg=poly_deg, do_print=do_print)
-    generic_variations = enum.create_rational_variations_enum()
+    generic_variations = _create_standard_lhs_cached(poly_deg, coefficients_limit)
     if out_path is not None:
         with open(out_path, 'wb') as file:
-            pickle.dump(generic_variations, file)
+            pickle.dump(generic_variations, file, protocol=pickle.HIGHEST_PROTOCOL)
     if do_print:
         print("Finished. Took {} sec".format(time() - strt))
     return generic_variations
@@ -2,6 +2,8 @@ import os
 import sys
 import argparse
 import pickle
+import tempfile
+from functools import lru_cache
 from time import time
 import sympy
 from enumerate_over_gcf import multi_core_enumeration_wrapper, g_N_verify_terms
@@ -143,7 +145,18 @@ def get_hash_filename(sympy_consts, args):
     return name
 
 
-# Initialize the argument parser that accepts inputs from the end user
+def get_usable_cores():
+    """ number of cores this process may actually use (affinity aware, not just cpu_count). """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # sched_getaffinity exists only on linux
+        return os.cpu_count() or 1
+
+
+# Initialize the argument parser that accepts inputs from the end user.
+# building the subparser tree is not free, and the parser is stateless once built - cache the
+# single instance (parse_args can be called on it repeatedly, e.g. once per API test).
+@lru_cache(maxsize=1)
 def init_parser():
     parser = argparse.ArgumentParser(
         description='TODO',
@@ -215,6 +228,12 @@ def enumerate_over_gcf_main(args):
     # same path to hash_tables no matter what
     os.chdir(os.path.dirname(os.path.realpath(__file__)))
 
+    # oversubscribing cores only adds scheduling overhead - clamp to what the host can give us.
+    usable_cores = get_usable_cores()
+    if args.num_of_cores > usable_cores:
+        print(f'requested {args.num_of_cores} cores, but only {usable_cores} usable. clamping.')
+        args.num_of_cores = usable_cores
+
     # {an} series generator
     an_generator, poly_a_order = get_custom_an_generator(args)
     if poly_a_order is None:
@@ -244,8 +263,10 @@ def enumerate_over_gcf_main(args):
         create_bn_series=bn_generator
     )
 
-    with open('tmp_results', 'wb') as file:
-        pickle.dump(final_results, file)
+    # pid-unique scratch dump in the system temp dir, so searches running in parallel (e.g. tests
+    # spread over pytest-xdist workers) don't clobber each other and the repo isn't littered.
+    with open(os.path.join(tempfile.gettempdir(), f'tmp_results_{os.getpid()}'), 'wb') as file:
+        pickle.dump(final_results, file, protocol=pickle.HIGHEST_PROTOCOL)
     return final_results
 
 
@@ -1,134 +1,196 @@
 import unittest
 import main
+import multiprocessing
 import os
 import pickle
+import shutil
+import tempfile
+import pytest
+from concurrent.futures import ProcessPoolExecutor
 from sympy import E as e
 from lhs_generators import create_standard_lhs
 
 
+def parse_command(argv):
+    """
+    parse an API command line into search args. when running under pytest-xdist the test cases
+    themselves are spread across cores, so inner searches are capped to one core each.
+    """
+    parser = main.init_parser()
+    args = parser.parse_args(argv)
+    if os.environ.get('PYTEST_XDIST_WORKER') and getattr(args, 'num_of_cores', None):
+        args.num_of_cores = 1
+    return args
+
+
+# every test is an independent end-to-end search over its own argv, so the cases run on a process
+# pool and the test methods only assert on the returned results. '{tmpdir}' is substituted per
+# case with a private scratch directory.
+_CASES = {
+    'test_MITM_api1': ['MITM_RF', '-lhs_constant', 'e', '-num_of_cores', '1', '-lhs_search_limit', '5',
+                       '-poly_a_order', '2', '-poly_a_coefficient_max', '4', '-poly_b_order', '2',
+                       '-poly_b_coefficient_max', '4'],
+    'test_MITM_api2': ['MITM_RF', '-lhs_constant', 'zeta', '-function_value', '3', '-num_of_cores', '2',
+                       '-lhs_search_limit', '14', '-poly_a_order', '3', '-poly_a_coefficient_max', '19',
+                       '-poly_b_order', '3', '-poly_b_coefficient_max', '19', '--zeta3_an', '--zeta_bn'],
+    'test_MITM_api3': ['MITM_RF', '-lhs_constant', 'catalan', 'pi-acosh_2', '-num_of_cores', '1',
+                       '-lhs_search_limit', '8', '-poly_a_order', '3', '-poly_a_coefficient_max', '14',
+                       '-poly_b_order', '1', '-poly_b_coefficient_max', '5', '--catalan_bn'],
+    'test_MITM_api4': ['MITM_RF', '-lhs_constant', 'pi', '-num_of_cores', '2', '-lhs_search_limit', '20',
+                       '-poly_a_order', '2', '-poly_a_coefficient_max', '13', '-poly_b_order', '3',
+                       '-poly_b_coefficient_max', '11', '--polynomial_shift1_bn'],
+    'test_MITM_api5': ['MITM_RF', '-lhs_constant', 'catalan', '-num_of_cores', '2', '-lhs_search_limit', '20',
+                       '-poly_a_order', '3', '-poly_a_coefficient_max', '7', '-poly_b_order', '4',
+                       '-poly_b_coefficient_max', '2', '--integer_factorization_bn'],
+    'test_ESMA_api1': ['ESMA', '-out_dir', '{tmpdir}', '-mode', 'search', '-constant', 'e',
+                       '-cycle_range', '2', '2', '-depth', '105', '-poly_deg', '1', '-coeff_lim', '2',
+                       '-no_print'],
+    'test_ESMA_api2': ['ESMA', '-out_dir', '{tmpdir}/lhs', '-mode', 'build', '-lhs', 'standard',
+                       '-poly_deg', '1', '-coeff_lim', '1', '-no_print'],
+    'test_ESMA_api3': ['ESMA', '-mode', 'search', '-constant', 'e', '-cycle_range', '2', '2',
+                       '-lhs', '{tmpdir}/lhs', '-no_print'],
+}
+
+# cases that take minutes are never pre-submitted ahead of their own test - deselecting them
+# (-m "not slow") must actually skip the work.
+_SLOW_CASES = frozenset({'test_MITM_api3'})
+
+g_executor = None
+g_max_workers = 1
+g_futures = {}
+
+
+def _run_case(name, argv):
+    """
+    pool task - run one API case end to end.
+    :return: (results, scratch directory used by the case)
+    """
+    tmpdir = tempfile.mkdtemp()
+    argv = [arg.replace('{tmpdir}', tmpdir) for arg in argv]
+    if name == 'test_ESMA_api3':    # this case searches with a pre-existing enumeration binary
+        with open(os.path.join(tmpdir, 'lhs'), 'wb') as file:
+            pickle.dump(create_standard_lhs(poly_deg=1, coefficients_limit=2, do_print=False), file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+    args = parse_command(argv)
+    if argv[0] == 'MITM_RF':
+        results = main.enumerate_over_gcf_main(args)
+    else:
+        results = main.enumerate_over_signed_rcf_main(args)
+    return results, tmpdir
+
+
+def _submit_case(name):
+    if name not in g_futures:
+        g_futures[name] = g_executor.submit(_run_case, name, _CASES[name])
+    return g_futures[name]
+
+
+def setUpModule():
+    # the workers are not daemonic (unlike multiprocessing.Pool), so the searches may open their
+    # own inner pools. cases are submitted lazily by the tests that ask for them - an eager
+    # fan-out would run deselected cases too, and would run every case once per xdist worker.
+    # spawned (not forked) workers, because numba's default threading layer is not fork safe and
+    # forking after the parallel kernels were compiled hangs the forking interpreter on exit.
+    global g_executor, g_max_workers
+    g_max_workers = min(len(_CASES), main.get_usable_cores())
+    g_executor = ProcessPoolExecutor(max_workers=g_max_workers,
+                                     mp_context=multiprocessing.get_context('spawn'))
+
+
+def tearDownModule():
+    # drop cases that never got asked for (e.g. deselected tests) and clean the scratch dirs.
+    g_executor.shutdown(cancel_futures=True)
+    for future in g_futures.values():
+        if future.done() and not future.cancelled() and future.exception() is None:
+            _, tmpdir = future.result()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
 class APITests(unittest.TestCase):
 
+    def __case_results(self):
+        future = _submit_case(self._testMethodName)
+        # when several workers are available (and xdist isn't already spreading the tests itself),
+        # feed the idle ones the remaining regular cases - later tests will ask for them anyway.
+        if g_max_workers > 1 and not os.environ.get('PYTEST_XDIST_WORKER'):
+            for name in _CASES:
+                if name not in _SLOW_CASES:
+                    _submit_case(name)
+        results, tmpdir = future.result()
+        return results, tmpdir
+
     def test_MITM_api1(self):
-        cmd = 'MITM_RF -lhs_constant e -num_of_cores 1 -lhs_search_limit 5 -poly_a_order 2' \
-                 + ' -poly_a_coefficient_max 4 -poly_b_order 2 -poly_b_coefficient_max 4'
-        cmd = cmd.split(' ')
-        parser = main.init_parser()
-        args = parser.parse_args(cmd)
-        results = main.enumerate_over_gcf_main(args)
+        results, _ = self.__case_results()
         print(results)
         self.assertEqual(len(results), 17)
+        results_set = frozenset(results)    # O(1) membership for the latex lookups below
         self.assertIn('\\frac{1 + e}{-1 + e} = 2 + \\frac{1}{6 + \\frac{1}{10 + \\frac{1}{14 + \\frac{1}{18 + ' +
-                      '\\frac{1}{..}}}}}', results)
+                      '\\frac{1}{..}}}}}', results_set)
         self.assertIn('\\frac{1}{-2 + e} = 1 + \\frac{1}{2 + \\frac{2}{3 + \\frac{3}{4 + \\frac{4}{5 + ' +
-                      '\\frac{5}{..}}}}}', results)
+                      '\\frac{5}{..}}}}}', results_set)
 
     def test_MITM_api2(self):
-        cmd = 'MITM_RF -lhs_constant zeta -function_value 3 -num_of_cores 2 -lhs_search_limit ' +\
-              '14 -poly_a_order 3 -poly_a_coefficient_max 19 -poly_b_order 3 -poly_b_coefficient_max 19 ' +\
-              '--zeta3_an --zeta_bn'
-        cmd = cmd.split(' ')
-        parser = main.init_parser()
-        args = parser.parse_args(cmd)
-        results = main.enumerate_over_gcf_main(args)
+        results, _ = self.__case_results()
         print(results)
         self.assertEqual(len(results), 3)
+        results_set = frozenset(results)
         self.assertIn(
             '\\frac{8}{7 \\zeta\\left(3\\right)} = 1 - \\frac{1}{21 - \\frac{64}{95 - \\frac{729}{259 - ' +
-            '\\frac{4096}{549 - \\frac{15625}{..}}}}}',results)
+            '\\frac{4096}{549 - \\frac{15625}{..}}}}}', results_set)
         self.assertIn(
             '\\frac{12}{7 \\zeta\\left(3\\right)} = 2 - \\frac{16}{36 - \\frac{1024}{160 - \\frac{11664}{434 - ' +
-            '\\frac{65536}{918 - \\frac{250000}{..}}}}}', results)
+            '\\frac{65536}{918 - \\frac{250000}{..}}}}}', results_set)
         self.assertIn(
             '\\frac{6}{\\zeta\\left(3\\right)} = 5 - \\frac{1}{117 - \\frac{64}{535 - \\frac{729}{1463 - ' +
-            '\\frac{4096}{3105 - \\frac{15625}{..}}}}}', results)
+            '\\frac{4096}{3105 - \\frac{15625}{..}}}}}', results_set)
 
+    @pytest.mark.slow
     def test_MITM_api3(self):    # this one take a few minutes
-        cmd = 'MITM_RF -lhs_constant catalan pi-acosh_2 -num_of_cores 1 -lhs_search_limit 8' + \
-              ' -poly_a_order 3 -poly_a_coefficient_max 14 -poly_b_order 1 -poly_b_coefficient_max 5' + \
-              ' --catalan_bn'
-        cmd = cmd.split(' ')
-        parser = main.init_parser()
-        args = parser.parse_args(cmd)
-        results = main.enumerate_over_gcf_main(args)
+        results, _ = self.__case_results()
         print(results)
         self.assertEqual(len(results), 1)
+        results_set = frozenset(results)
         self.assertIn('\\frac{6}{- \\pi \\operatorname{acosh}{\\left(2 \\right)} + 8 Catalan\\left(\\right)} = 2 - ' +
                       '\\frac{2}{19 - \\frac{108}{56 - \\frac{750}{113 - \\frac{2744}{190 - \\frac{7290}{..}}}}}',
-                      results)
+                      results_set)
 
     def test_MITM_api4(self):
-        cmd = 'MITM_RF -lhs_constant pi -num_of_cores 2 -lhs_search_limit 20 -poly_a_order 2' +\
-              ' -poly_a_coefficient_max 13 -poly_b_order 3 -poly_b_coefficient_max 11 --polynomial_shift1_bn'
-        cmd = cmd.split(' ')
-        parser = main.init_parser()
-        args = parser.parse_args(cmd)
-        results = main.enumerate_over_gcf_main(args)
+        results, _ = self.__case_results()
         print(results)
         self.assertEqual(len(results), 20)
 
     def test_MITM_api5(self):
-        cmd = 'python main.py MITM_RF -lhs_constant catalan -num_of_cores 2 -lhs_search_limit 20 -poly_a_order 3' +\
-              ' -poly_a_coefficient_max 7 -poly_b_order 4 -poly_b_coefficient_max 2 --integer_factorization_bn'
-        cmd = cmd.split(' ')[2:]
-        parser = main.init_parser()
-        args = parser.parse_args(cmd)
-        results = main.enumerate_over_gcf_main(args)
+        results, _ = self.__case_results()
         print(results)
         self.assertEqual(len(results), 1)
-        self.assertIn('\\frac{2}{-1 + 2 Catalan\\left(\\right)} = 3 - \\frac{6}{13 - \\frac{64}{29 - \\frac{270}{51 - \\frac{768}{79 - \\frac{1750}{..}}}}}', results)
+        results_set = frozenset(results)
+        self.assertIn('\\frac{2}{-1 + 2 Catalan\\left(\\right)} = 3 - \\frac{6}{13 - \\frac{64}{29 - \\frac{270}{51 - \\frac{768}{79 - \\frac{1750}{..}}}}}', results_set)
 
     def test_ESMA_api1(self): # Test full enumeration and search configuration including saving binaries. Might ake a little longer
-        cmd = 'ESMA -out_dir ./tmp -mode search -constant e -cycle_range 2 2 -depth 105 -poly_deg 1' + \
-              ' -coeff_lim 2 -no_print'
-        cmd = cmd.split(' ')
-        parser = main.init_parser()
-        args = parser.parse_args(cmd)
-        results = main.enumerate_over_signed_rcf_main(args)
+        results, tmpdir = self.__case_results()
         self.assertEqual(len(results), 13)
-        adjusted = [[res[0], res[1], list(res[3])] for res in results]
-        self.assertIn([(e / (e - 1)), [1, -1], [1, 0, -2, 0, 1]], adjusted)
-        self.assertIn([-1 + e, [-1, 1], [1, 0, -2, 0, 1]], adjusted)
+        adjusted = frozenset((res[0], tuple(res[1]), tuple(res[3])) for res in results)
+        self.assertIn(((e / (e - 1)), (1, -1), (1, 0, -2, 0, 1)), adjusted)
+        self.assertIn((-1 + e, (-1, 1), (1, 0, -2, 0, 1)), adjusted)
         print('Search results are as expected.')
-        files_there = os.path.exists('./tmp/res_list_0') and os.path.exists('./tmp/recurring_by_value_0')
+        files_there = os.path.exists(os.path.join(tmpdir, 'res_list_0')) \
+            and os.path.exists(os.path.join(tmpdir, 'recurring_by_value_0'))
         self.assertTrue(files_there)
-        os.remove('./tmp/res_list_0')
-        os.remove('./tmp/recurring_by_value_0')
-        os.rmdir('./tmp')
-        print("Successfully removed result output files.")
 
     def test_ESMA_api2(self): # Test standard build configuration.
-        cmd = 'ESMA -out_dir ./tmp -mode build -lhs standard -poly_deg 1 -coeff_lim 1 -no_print'
-        cmd = cmd.split(' ')
-        parser = main.init_parser()
-        args = parser.parse_args(cmd)
-        lhs = main.enumerate_over_signed_rcf_main(args)
+        lhs, tmpdir = self.__case_results()
         print('Creating enumeration not through API to compare:')
-        self.assertEqual(lhs, create_standard_lhs(poly_deg=1, coefficients_limit=1, do_print=(not args.no_print)))
+        self.assertEqual(lhs, create_standard_lhs(poly_deg=1, coefficients_limit=1, do_print=False))
         print("Identical enumerations.")
-        file_there = os.path.exists('./tmp')
+        file_there = os.path.exists(os.path.join(tmpdir, 'lhs'))
         self.assertTrue(file_there)
-        os.remove('./tmp')
-        print('Successfuly removed output file')
 
     def test_ESMA_api3(self): # Test search using an existing enumeration configuration.
-        print('Creating and saving a temporary generic LHS enumeration.')
-        custom_enum = create_standard_lhs(poly_deg=1, coefficients_limit=2, do_print=False)
-        path = './tmp'
-        with open(path, 'wb') as file:
-            pickle.dump(custom_enum, file)
-        print('Calling using API:')
-        cmd = 'ESMA, -mode, search, -constant, e, -cycle_range, 2, 2, -lhs, ./tmp, -no_print'
-        cmd = cmd.split(', ')
-        parser = main.init_parser()
-        args = parser.parse_args(cmd)
-        print('Searching using generic LHS')
-        results = main.enumerate_over_signed_rcf_main(args)
-        os.remove(path)
-        print('Deleted temporary generic LHS enumeration from disk')
+        results, _ = self.__case_results()
         self.assertEqual(len(results), 13)
-        adjusted = [[res[0], res[1], list(res[3])] for res in results]
-        self.assertIn([(e / (e - 1)), [1, -1], [1, 0, -2, 0, 1]], adjusted)
-        self.assertIn([(e / (-2 + e)), [1, 1], [1, 0, 0, -1, 0, 0, -1, 0, 0, 1]], adjusted)
+        adjusted = frozenset((res[0], tuple(res[1]), tuple(res[3])) for res in results)
+        self.assertIn(((e / (e - 1)), (1, -1), (1, 0, -2, 0, 1)), adjusted)
+        self.assertIn(((e / (-2 + e)), (1, 1), (1, 0, 0, -1, 0, 0, -1, 0, 0, 1)), adjusted)
         print('Search results are as expected.')
 
 